@@ -0,0 +1,156 @@
+"""
+대화 이력 표현 방식 벤치마크 (dict 기반 vs ChatMessage)
+
+- 세션 하나당 메모리 사용량 (tracemalloc)
+- OpenAI 요청 payload 생성 + 로그 직렬화 시간
+  - dict + json: 기존 방식 (hasattr 순회 + stdlib json)
+  - dict + orjson: 기존 dict 이력을 orjson 으로만 바꾼 경우
+  - ChatMessage + orjson: 현재 방식 (slots 객체에서 dict 생성 + orjson)
+
+실행: python -m benchmarks.bench_messages [turns] [sessions]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import orjson
+
+from models.message import ChatMessage
+
+
+class FakeTextContent:
+    """MCP TextContent 대역"""
+
+    def __init__(self, text: str):
+        self.type = "text"
+        self.text = text
+
+    def model_dump(self):
+        return {"type": self.type, "text": self.text}
+
+
+def fake_tool_call(index: int):
+    return SimpleNamespace(
+        id=f"call_{index}",
+        type="function",
+        function=SimpleNamespace(name="get_meeting_rooms", arguments='{"floor": 3, "date": "2025-06-20"}'),
+    )
+
+
+def build_dict_session(turns: int) -> list:
+    messages = [{"role": "system", "content": "system prompt " * 50}]
+    for i in range(turns):
+        tool_call = fake_tool_call(i)
+        messages.append({"role": "user", "content": f"{i}번째 질문: 3층 회의실 예약 현황 알려주세요"})
+        messages.append({
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [{
+                "id": tool_call.id,
+                "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+                "type": tool_call.type,
+            }],
+        })
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": [FakeTextContent('{"rooms": ["301", "302", "303"], "available": true}')],
+        })
+        messages.append({"role": "assistant", "content": f"{i}번째 답변: 3층 회의실 301, 302, 303 이 예약 가능합니다."})
+    return messages
+
+
+def build_model_session(turns: int) -> list:
+    messages = [ChatMessage.system("system prompt " * 50)]
+    for i in range(turns):
+        tool_call = fake_tool_call(i)
+        messages.append(ChatMessage.user(f"{i}번째 질문: 3층 회의실 예약 현황 알려주세요"))
+        messages.append(ChatMessage.assistant(None, [tool_call]))
+        messages.append(ChatMessage.tool(tool_call.id, [FakeTextContent('{"rooms": ["301", "302", "303"], "available": true}')]))
+        messages.append(ChatMessage.assistant(f"{i}번째 답변: 3층 회의실 301, 302, 303 이 예약 가능합니다."))
+    return messages
+
+
+def walk_dict_session(messages: list) -> list:
+    # 기존 log_conversation 의 hasattr 순회 방식
+    serializable = []
+    for message in messages:
+        item = {"role": message["role"], "content": []}
+        if isinstance(message["content"], str):
+            item["content"] = message["content"]
+        elif isinstance(message["content"], list):
+            for content_item in message["content"]:
+                if hasattr(content_item, "to_dict"):
+                    item["content"].append(content_item.to_dict())
+                elif hasattr(content_item, "dict"):
+                    item["content"].append(content_item.dict())
+                elif hasattr(content_item, "model_dump"):
+                    item["content"].append(content_item.model_dump())
+                else:
+                    item["content"].append(content_item)
+        serializable.append(item)
+    return serializable
+
+
+def dump_model(value):
+    return value.model_dump()
+
+
+def serialize_dict_json(messages: list):
+    # call_llm 요청 payload + log_conversation 파일
+    json.dumps(messages, default=dump_model)
+    return json.dumps(walk_dict_session(messages), default=str)
+
+
+def serialize_dict_orjson(messages: list):
+    orjson.dumps(messages, default=dump_model)
+    return orjson.dumps(walk_dict_session(messages), default=str)
+
+
+def serialize_model_orjson(messages: list):
+    payload = [message.to_openai() for message in messages]
+    orjson.dumps(payload)
+    return orjson.dumps(payload)
+
+
+def measure_memory(build, turns: int, sessions: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(turns) for _ in range(sessions)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / sessions
+
+
+def measure_time(build, serialize, turns: int, repeat: int = 200, rounds: int = 5) -> float:
+    """rounds 번 측정한 값 중 최솟값 (ms/serialize)"""
+    messages = build(turns)
+    results = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            serialize(messages)
+        results.append((time.perf_counter() - started) / repeat * 1000)
+    return min(results)
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"turns/session={turns}, sessions={sessions}")
+    for name, build, serialize in (
+        ("dict + json", build_dict_session, serialize_dict_json),
+        ("dict + orjson", build_dict_session, serialize_dict_orjson),
+        ("ChatMessage + orjson", build_model_session, serialize_model_orjson),
+    ):
+        memory = measure_memory(build, turns, sessions)
+        elapsed = measure_time(build, serialize, turns)
+        print(f"{name:>20}: {memory / 1024:8.1f} KiB/session, {elapsed:6.3f} ms/serialize")
+
+
+if __name__ == "__main__":
+    main()
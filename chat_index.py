@@ -0,0 +1,186 @@
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+# 한글은 띄어쓰기/조사 때문에 단어 단위로 자르면 검색이 잘 안 되므로 글자 unigram + bigram 으로 색인
+# "3층", "10시" 처럼 숫자 바로 뒤에 붙은 한글은 숫자 + 첫 글자를 한 토큰으로도 색인
+# 검색어는 bigram 으로만 찾고 (글자 하나만 겹치는 문서까지 걸리지 않도록), 한 글자 검색어일 때만 unigram 사용
+HANGUL_RUN = re.compile(r"[가-힣]+")
+NUMBER_HANGUL_RUN = re.compile(r"(\d+)([가-힣]+)")
+WORD_RUN = re.compile(r"\d+[가-힣]+|[가-힣]+|[^\W_가-힣]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_RADIUS = 40
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    tokens = []
+    for run in WORD_RUN.findall(text.lower()):
+        number_hangul = NUMBER_HANGUL_RUN.fullmatch(run)
+        if number_hangul:
+            number, hangul = number_hangul.groups()
+            tokens.append(number)
+            tokens.append(number + hangul[0])
+            tokens.extend(hangul_grams(hangul))
+        elif HANGUL_RUN.fullmatch(run):
+            tokens.extend(hangul_grams(run))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def tokenize_query(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    tokens = []
+    for run in WORD_RUN.findall(text.lower()):
+        number_hangul = NUMBER_HANGUL_RUN.fullmatch(run)
+        if number_hangul:
+            number, hangul = number_hangul.groups()
+            tokens.append(number + hangul[0])
+            tokens.extend(hangul_bigrams(hangul))
+        elif HANGUL_RUN.fullmatch(run):
+            tokens.extend(hangul_bigrams(run) or [run])
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def hangul_grams(run: str) -> list[str]:
+    return list(run) + hangul_bigrams(run)
+
+
+def hangul_bigrams(run: str) -> list[str]:
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+@dataclass(slots=True)
+class IndexedConversation:
+    session_id: str
+    emp_message: str
+    ai_message: str
+    new_date: datetime
+    length: int
+
+
+class EmployeeIndex:
+    def __init__(self):
+        self.docs: list[IndexedConversation] = []
+        self.postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self.total_length = 0
+
+    def add(self, doc: IndexedConversation, tokens: list[str]):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.total_length += doc.length
+        for token in tokens:
+            postings = self.postings[token]
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+
+    def score(self, terms: list[str]) -> dict[int, float]:
+        doc_count = len(self.docs)
+        avg_length = self.total_length / doc_count if doc_count else 0.0
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc_id].length / (avg_length or 1))
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+
+class ChatIndex:
+    """
+    사번별 대화(EMP_MESSAGE / AI_MESSAGE) 역색인
+
+    프로세스 메모리에만 있으므로 worker / pod 마다 따로 유지됨
+    - 자기 프로세스의 insert 는 insert 경로에서 바로 반영
+    - 다른 프로세스가 쓴 대화는 주기적인 NEW_DATE catch-up(add_rows) 으로 반영
+    같은 행이 두 경로로 들어와도 한 번만 색인되도록, insert 경로에서도 DB 에 저장된 NEW_DATE 를 사용해야 함
+    """
+
+    def __init__(self):
+        self.employees: dict[str, EmployeeIndex] = defaultdict(EmployeeIndex)
+        self.seen: set[tuple] = set()
+        # catch-up 으로 읽은 가장 최근 NEW_DATE
+        self.high_water_mark: Optional[datetime] = None
+        self.ready = False
+
+    def add(self, session_id: str, emp_code: str, emp_message: Optional[str], ai_message: Optional[str], new_date: datetime):
+        # 테이블에 row id 가 없어서 NEW_DATE 가 같은 행은 내용으로 구분
+        key = (str(emp_code), session_id, new_date, hash(emp_message), hash(ai_message))
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+
+        tokens = tokenize(emp_message) + tokenize(ai_message)
+        doc = IndexedConversation(
+            session_id=session_id,
+            emp_message=emp_message or "",
+            ai_message=ai_message or "",
+            new_date=new_date,
+            length=len(tokens),
+        )
+        self.employees[str(emp_code)].add(doc, tokens)
+        return True
+
+    def add_rows(self, rows: list[dict]) -> int:
+        added = 0
+        for row in rows:
+            added += self.add(row["SESSION_ID"], row["EMP_CODE"], row["EMP_MESSAGE"], row["AI_MESSAGE"], row["NEW_DATE"])
+            if self.high_water_mark is None or row["NEW_DATE"] > self.high_water_mark:
+                self.high_water_mark = row["NEW_DATE"]
+        return added
+
+    def search(self, emp_code: str, query: str, page: int = 1, page_size: int = 20) -> dict:
+        index = self.employees.get(str(emp_code))
+        terms = tokenize_query(query)
+        if index is None or not terms:
+            return {"total": 0, "page": page, "page_size": page_size, "hits": []}
+
+        scores = index.score(terms)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -index.docs[item[0]].new_date.timestamp()))
+        start = (page - 1) * page_size
+
+        hits = []
+        for doc_id, score in ranked[start:start + page_size]:
+            doc = index.docs[doc_id]
+            hits.append({
+                "session_id": doc.session_id,
+                "new_date": doc.new_date,
+                "score": round(score, 4),
+                "emp_snippet": make_snippet(doc.emp_message, query, terms),
+                "ai_snippet": make_snippet(doc.ai_message, query, terms),
+            })
+        return {"total": len(ranked), "page": page, "page_size": page_size, "hits": hits}
+
+
+def make_snippet(text: str, query: str, terms: list[str]) -> str:
+    if not text:
+        return ""
+    lowered = text.lower()
+    position = lowered.find(query.strip().lower())
+    if position < 0:
+        positions = [p for p in (lowered.find(term) for term in terms) if p >= 0]
+        position = min(positions) if positions else 0
+
+    start = max(position - SNIPPET_RADIUS, 0)
+    end = min(position + SNIPPET_RADIUS, len(text))
+    snippet = text[start:end]
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet = snippet + "…"
+    return snippet
+
+
+chat_index = ChatIndex()
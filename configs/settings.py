@@ -5,3 +5,8 @@ load_dotenv(dotenv_path="settings.env")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 MCP_SINGLE_SERVER_URL = os.getenv("MCP_SINGLE_SERVER_URL")
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports_out")
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_SAFETY_LAG_SECONDS = int(os.getenv("EXPORT_SAFETY_LAG_SECONDS", "300"))
+MODEL_FAST = os.getenv("MODEL_FAST", "gpt-4o-mini")
+MODEL_SMART = os.getenv("MODEL_SMART", "gpt-4o")
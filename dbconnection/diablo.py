@@ -1,3 +1,5 @@
+import threading
+
 import pyodbc
 from fastapi import HTTPException
 from dotenv import load_dotenv
@@ -25,6 +27,17 @@ class DBConnectionManager:
             self.connection = None
             print("❌ DB 연결 종료됨")
 
+    def ping(self):
+        if self.connection is None:
+            raise HTTPException(status_code=500, detail="DB 연결이 되어 있지 않습니다.")
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        finally:
+            cursor.close()
+
     def execute_query(self, query: str, params: tuple = ()):
         if self.connection is None:
             raise HTTPException(status_code=500, detail="DB 연결이 되어 있지 않습니다.")
@@ -46,6 +59,39 @@ class DBConnectionManager:
         rows = cursor.fetchall()
         return [dict(zip(columns, row)) for row in rows]
 
+    def iter_query(self, query: str, params: tuple = (), chunk_size: int = 5000):
+        """결과를 한 번에 메모리에 올리지 않고 chunk_size 단위로 끊어서 반환 (forward-only 커서)"""
+        if self.connection is None:
+            raise HTTPException(status_code=500, detail="DB 연결이 되어 있지 않습니다.")
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [dict(zip(columns, row)) for row in rows]
+        except pyodbc.Error as e:
+            raise HTTPException(status_code=500, detail=f"쿼리 실행 실패: {str(e)}")
+        finally:
+            cursor.close()
+
+    def execute_write_query_returning(self, query: str, params: tuple = ()):
+        """OUTPUT 절이 있는 INSERT/UPDATE 실행 후 반환된 행을 돌려줌"""
+        if self.connection is None:
+            raise HTTPException(status_code=500, detail="DB 연결이 되어 있지 않습니다.")
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchall()
+            self.connection.commit()
+            return [dict(zip(columns, row)) for row in rows]
+        except pyodbc.Error as e:
+            self.connection.rollback()
+            raise HTTPException(status_code=500, detail=f"쿼리 실행 실패: {str(e)}")
+
     def execute_write_query(self, query: str, params: tuple = ()):
         if self.connection is None:
             raise HTTPException(status_code=500, detail="DB 연결이 되어 있지 않습니다.")
@@ -68,21 +114,46 @@ dsn = (
 )
 
 db_manager = DBConnectionManager(dsn)
+# readiness 확인 전용 커넥션. 요청 처리용 커넥션과 분리해서 별도 스레드에서 사용
+probe_manager = DBConnectionManager(dsn)
+_probe_lock = threading.Lock()
+# 검색 색인 catch-up 전용 커넥션. 색인 task 가 스레드에서만 사용
+index_manager = DBConnectionManager(dsn)
 
 
 def init_db_connection():
     try:
-        print(dsn)
-
         db_manager.connect()
         # print("✅ Database connection established successfully")
+        return True
     except Exception as e:
         print(f"❌ Failed to connect to the database: {e}")
+        return False
+
+
+def check_db_connection(lock_timeout: float = 1.0):
+    """끊어진 요청용 커넥션은 다시 연결하고, 전용 커넥션으로 SELECT 1 실행. 스레드에서 호출"""
+    if not _probe_lock.acquire(timeout=lock_timeout):
+        raise RuntimeError("이전 DB 상태 확인이 아직 끝나지 않았습니다.")
+    try:
+        if db_manager.connection is None:
+            db_manager.connect()
+        probe_manager.connect()
+        try:
+            probe_manager.ping()
+        except Exception:
+            probe_manager.close()
+            raise
+        return True
+    finally:
+        _probe_lock.release()
 
 
 def close_db_connection():
     try:
         db_manager.close()
+        probe_manager.close()
+        index_manager.close()
         # print("❌ Database connection closed successfully")
     except Exception as e:
         print(f"❌ Failed to close the database connection: {e}")
@@ -0,0 +1,223 @@
+"""
+대화 이력 Parquet 내보내기 (분석용)
+
+- dbo.TMP_MCP_CONVERSATION 을 NEW_DATE high-water mark 이후부터 chunk 단위로 읽어
+  {EXPORT_DIR}/conversations/date=YYYY-MM-DD/emp_code=XXX/*.parquet 로 저장
+- conversations/*.json 트랜스크립트 파일을 파일명 타임스탬프 기준으로 읽어, 이전 스냅샷 이후 추가된 메시지만
+  {EXPORT_DIR}/transcripts/date=YYYY-MM-DD/*.parquet 로 저장
+- chunk 하나를 쓸 때마다 state.json 에 high-water mark 를 기록하므로 중단 후 재실행해도 이어서 진행
+- high-water mark 와 같은 시각의 행은 다시 읽되 이미 내보낸 행(boundary_keys)은 건너뜀
+- 늦게 commit 되는 행을 놓치지 않도록 현재 시각보다 EXPORT_SAFETY_LAG_SECONDS 이전까지만 내보냄
+
+실행: python -m exports.conversations_export
+"""
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from configs.logging import logger
+from configs.settings import EXPORT_DIR, EXPORT_CHUNK_SIZE, EXPORT_SAFETY_LAG_SECONDS
+from dbconnection import diablo
+from repositories import conversations_repository
+
+STATE_FILE = os.path.join(EXPORT_DIR, "state.json")
+TRANSCRIPT_DIR = "conversations"
+TRANSCRIPT_TIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+CONVERSATION_SCHEMA = pa.schema([
+    ("SESSION_ID", pa.string()),
+    ("EMP_CODE", pa.string()),
+    ("EMP_MESSAGE", pa.string()),
+    ("AI_MESSAGE", pa.string()),
+    ("NEW_DATE", pa.timestamp("us")),
+    ("date", pa.string()),
+    ("emp_code", pa.string()),
+])
+
+TRANSCRIPT_SCHEMA = pa.schema([
+    ("FILE_NAME", pa.string()),
+    ("LOGGED_AT", pa.timestamp("s")),
+    ("MESSAGE_INDEX", pa.int32()),
+    ("ROLE", pa.string()),
+    ("CONTENT", pa.string()),
+    ("date", pa.string()),
+])
+
+
+def load_state() -> dict:
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, "r") as f:
+        return json.load(f)
+
+
+def save_state(state: dict):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def write_partitioned(rows: list, schema: pa.Schema, root: str, partition_cols: list):
+    table = pa.Table.from_pylist(rows, schema=schema)
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=partition_cols,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+    )
+
+
+def conversation_key(row: dict) -> str:
+    """NEW_DATE 가 같은 행을 구분하기 위한 키 (테이블에 별도 row id 가 없음)"""
+    raw = "\x1f".join(
+        str(row[column] or "") for column in ("SESSION_ID", "EMP_CODE", "EMP_MESSAGE", "AI_MESSAGE")
+    )
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+async def export_conversations(state: dict) -> int:
+    """DB 대화 테이블을 high-water mark 이후부터 증분 내보내기"""
+    root = os.path.join(EXPORT_DIR, "conversations")
+    checkpoint = state.get("conversations") or {}
+    if isinstance(checkpoint, str):
+        # 이전 형식 (NEW_DATE 문자열만 저장)
+        checkpoint = {"new_date": checkpoint}
+    since = datetime.fromisoformat(checkpoint["new_date"]) if checkpoint.get("new_date") else None
+    boundary_keys = set(checkpoint.get("boundary_keys", []))
+    until = datetime.now() - timedelta(seconds=EXPORT_SAFETY_LAG_SECONDS)
+
+    exported = 0
+    async for rows in conversations_repository.iter_conversations_since(since, until, EXPORT_CHUNK_SIZE):
+        new_rows = []
+        for row in rows:
+            key = conversation_key(row)
+            if row["NEW_DATE"] == since and key in boundary_keys:
+                continue
+            if row["NEW_DATE"] != since:
+                since = row["NEW_DATE"]
+                boundary_keys = set()
+            boundary_keys.add(key)
+
+            row["date"] = row["NEW_DATE"].strftime("%Y-%m-%d")
+            row["emp_code"] = row["EMP_CODE"] or "unknown"
+            new_rows.append(row)
+        if not new_rows:
+            continue
+        write_partitioned(new_rows, CONVERSATION_SCHEMA, root, ["date", "emp_code"])
+
+        exported += len(new_rows)
+        state["conversations"] = {"new_date": since.isoformat(), "boundary_keys": sorted(boundary_keys)}
+        save_state(state)
+        logger.info(f"Exported {exported} conversation rows (high-water mark: {since.isoformat()})")
+
+    return exported
+
+
+def _serialize_content(content) -> str:
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, ensure_ascii=False, default=str)
+
+
+def message_fingerprint(message: dict) -> str:
+    return hashlib.sha1(orjson.dumps(message, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def export_transcripts(state: dict) -> int:
+    """
+    conversations/*.json 트랜스크립트를 파일명 타임스탬프 기준으로 증분 내보내기
+
+    각 파일은 그 시점까지의 전체 대화 스냅샷이므로, 이전 스냅샷 이후에 늘어난 메시지만 내보냄
+    이전 스냅샷의 마지막 메시지가 현재 파일의 같은 위치와 다르면 (서버 재시작 등) 처음부터 내보냄
+    """
+    root = os.path.join(EXPORT_DIR, "transcripts")
+    checkpoint = state.get("transcripts") or {}
+    if isinstance(checkpoint, str):
+        # 이전 형식 (파일명 타임스탬프만 저장)
+        checkpoint = {"logged_at": checkpoint}
+    since = datetime.strptime(checkpoint["logged_at"], TRANSCRIPT_TIME_FORMAT) if checkpoint.get("logged_at") else None
+    message_count = checkpoint.get("message_count", 0)
+    last_fingerprint = checkpoint.get("last_fingerprint")
+    # 같은 초 안에 다시 쓰일 수 있는 파일은 다음 실행에서 처리
+    until = datetime.now() - timedelta(seconds=EXPORT_SAFETY_LAG_SECONDS)
+
+    pending = []
+    for path in glob.glob(os.path.join(TRANSCRIPT_DIR, "conversation_*.json")):
+        file_name = os.path.basename(path)
+        stamp = file_name[len("conversation_"):-len(".json")]
+        try:
+            logged_at = datetime.strptime(stamp, TRANSCRIPT_TIME_FORMAT)
+        except ValueError:
+            logger.warning(f"Skipping transcript with unexpected name: {file_name}")
+            continue
+        if (since is None or logged_at > since) and logged_at < until:
+            pending.append((logged_at, file_name, path))
+    pending.sort()
+
+    exported = 0
+    rows = []
+    for index, (logged_at, file_name, path) in enumerate(pending):
+        with open(path, "rb") as f:
+            conversation = orjson.loads(f.read())
+
+        start = message_count
+        if (
+            start == 0
+            or len(conversation) < start
+            or message_fingerprint(conversation[start - 1]) != last_fingerprint
+        ):
+            start = 0
+        for message_index in range(start, len(conversation)):
+            message = conversation[message_index]
+            rows.append({
+                "FILE_NAME": file_name,
+                "LOGGED_AT": logged_at,
+                "MESSAGE_INDEX": message_index,
+                "ROLE": message.get("role"),
+                "CONTENT": _serialize_content(message.get("content")),
+                "date": logged_at.strftime("%Y-%m-%d"),
+            })
+        message_count = len(conversation)
+        last_fingerprint = message_fingerprint(conversation[-1]) if conversation else None
+
+        # 같은 타임스탬프 파일이 chunk 경계에서 나뉘지 않도록 파일 단위로 flush
+        is_last = index == len(pending) - 1
+        if len(rows) >= EXPORT_CHUNK_SIZE or is_last:
+            if rows:
+                write_partitioned(rows, TRANSCRIPT_SCHEMA, root, ["date"])
+                exported += len(rows)
+                rows = []
+            state["transcripts"] = {
+                "logged_at": logged_at.strftime(TRANSCRIPT_TIME_FORMAT),
+                "message_count": message_count,
+                "last_fingerprint": last_fingerprint,
+            }
+            save_state(state)
+            logger.info(f"Exported {exported} transcript rows (high-water mark: {state['transcripts']['logged_at']})")
+
+    return exported
+
+
+async def run_export():
+    state = load_state()
+    diablo.init_db_connection()
+    try:
+        conversation_count = await export_conversations(state)
+    finally:
+        diablo.close_db_connection()
+    transcript_count = export_transcripts(state)
+    logger.info(f"Export finished: {conversation_count} conversation rows, {transcript_count} transcript rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_export())
@@ -1,16 +1,103 @@
 import streamlit as st
 from typing import Dict, Any
 import http_client as client
+from history_window import message_cursor, keep_newest, prepend_older, append_newer
 import time
 import uuid
 
+# 한 번에 화면에 그리는 메시지 수 / 서버에서 한 번에 가져오는 턴 수 / session_state 에 유지하는 최대 메시지 수
+RENDER_WINDOW = 40
+PAGE_TURNS = 20
+MAX_SESSION_MESSAGES = 200
+
+
 class Chatbot:
     def __init__(self, api_url: str):
         self.api_url = api_url
         if "messages" not in st.session_state:
             st.session_state["messages"] = []
+        if "visible_count" not in st.session_state:
+            st.session_state["visible_count"] = RENDER_WINDOW
+        # session_state 에 있는 구간 앞/뒤로 서버에 더 있는지
+        if "has_older" not in st.session_state:
+            st.session_state["has_older"] = False
+        if "has_newer" not in st.session_state:
+            st.session_state["has_newer"] = False
         self.messages = st.session_state["messages"]
 
+    def reset_history(self, messages: list, has_older: bool = False):
+        st.session_state["messages"] = messages
+        st.session_state["visible_count"] = RENDER_WINDOW
+        st.session_state["has_older"] = has_older
+        st.session_state["has_newer"] = False
+
+    async def load_latest(self, session_id: str) -> bool:
+        page = await client.get_chat_messages_page(self.api_url, session_id, PAGE_TURNS)
+        if not page:
+            return False
+        self.reset_history(page["chat_message_list"], page["has_more"])
+        return True
+
+    async def load_older(self):
+        """
+        메모리에 숨겨진 메시지를 먼저 보여주고, 다 보여줬으면 서버에서 이전 페이지 조회
+        상한을 넘으면 가장 새로운 쪽을 버리고(sliding window) 다시 불러올 수 있게 표시
+        """
+        messages = st.session_state["messages"]
+        if st.session_state["visible_count"] < len(messages):
+            st.session_state["visible_count"] += RENDER_WINDOW
+            return
+
+        cursor = message_cursor(messages[0]) if messages else None
+        if not st.session_state["has_older"] or cursor is None:
+            return
+        page = await client.get_chat_messages_page(
+            self.api_url, st.session_state["session_id"], PAGE_TURNS, before=cursor
+        )
+        if not page:
+            return
+
+        older = page["chat_message_list"]
+        kept, has_older, evicted = prepend_older(messages, older, page["has_more"], MAX_SESSION_MESSAGES)
+        st.session_state["messages"] = kept
+        st.session_state["has_older"] = has_older
+        if evicted:
+            st.session_state["has_newer"] = True
+        # 새로 불러온 이전 페이지부터 기존 화면 구간까지 보이도록
+        visible = st.session_state["visible_count"] + len(older)
+        st.session_state["visible_count"] = min(visible, len(kept))
+
+    async def load_newer(self):
+        """sliding window 로 버린 최신 쪽 페이지를 다시 조회. 상한을 넘으면 가장 오래된 쪽을 버림"""
+        messages = st.session_state["messages"]
+        cursor = message_cursor(messages[-1]) if messages else None
+        if not st.session_state["has_newer"] or cursor is None:
+            return
+        page = await client.get_chat_messages_page(
+            self.api_url, st.session_state["session_id"], PAGE_TURNS, after=cursor
+        )
+        if not page:
+            return
+
+        newer = page["chat_message_list"]
+        kept, has_newer, evicted = append_newer(messages, newer, page["has_more"], MAX_SESSION_MESSAGES)
+        st.session_state["messages"] = kept
+        st.session_state["has_newer"] = has_newer
+        if evicted:
+            st.session_state["has_older"] = True
+        st.session_state["visible_count"] = min(st.session_state["visible_count"] + len(newer), len(kept))
+
+    def trim_history(self):
+        """새 메시지가 쌓여 상한을 넘으면 오래된 턴부터 버리고, 버린 구간은 다시 서버에서 불러오도록 표시"""
+        messages = st.session_state["messages"]
+        if len(messages) <= MAX_SESSION_MESSAGES:
+            return
+
+        kept = keep_newest(messages, MAX_SESSION_MESSAGES)
+        st.session_state["messages"] = kept
+        st.session_state["visible_count"] = min(st.session_state["visible_count"], len(kept))
+        st.session_state["has_older"] = True
+
     def display_message(self, message: Dict[str, Any]):
         role = message["role"]
 
@@ -35,7 +122,7 @@ class Chatbot:
             st.header("📜 채팅 내역")
 
             if st.button("✏️ 새 채팅"):
-                st.session_state["messages"] = []
+                self.reset_history([])
                 st.session_state["session_id"] = str(uuid.uuid4())
                 st.rerun()
 
@@ -43,11 +130,7 @@ class Chatbot:
                 for chat in chat_list:
                     if st.button(chat.get("SESSION_ID")):
                         chat_id = chat["SESSION_ID"]
-                        messages = await client.get_chat_messages(self.api_url, chat_id)
-
-                        if messages:
-                            st.session_state["messages"] = []
-                            st.session_state["messages"] = messages
+                        if await self.load_latest(chat_id):
                             st.session_state["session_id"] = chat_id
                             st.rerun()
 
@@ -55,20 +138,45 @@ class Chatbot:
         if "session_id" not in st.session_state:
             st.session_state["session_id"] = str(uuid.uuid4())
 
-        if st.session_state["messages"]:
-            for message in st.session_state["messages"]:
-                self.display_message(message)
+        messages = st.session_state["messages"]
+        hidden = max(len(messages) - st.session_state["visible_count"], 0)
+        if hidden or st.session_state["has_older"]:
+            if st.button("⬆️ 이전 대화 더 보기"):
+                await self.load_older()
+                st.rerun()
+
+        started = time.perf_counter()
+        for message in messages[hidden:]:
+            self.display_message(message)
+        render_ms = (time.perf_counter() - started) * 1000
+        st.caption(f"⏱️ 렌더링 {render_ms:.1f} ms · 표시 {len(messages) - hidden}/{len(messages)} 메시지")
+
+        if st.session_state["has_newer"]:
+            if st.button("⬇️ 다음 대화 더 보기"):
+                await self.load_newer()
+                st.rerun()
 
-        query = st.chat_input("Ask a question")
+        query = st.chat_input("Ask a question") or st.session_state.pop("pending_query", None)
         if query:
-            st.session_state["messages"].append({"role": "user", "content": query})
+            # 이전 구간을 보고 있었다면 최신 구간을 다시 불러와 그린 뒤 이어서 대화
+            if st.session_state["has_newer"]:
+                if not await self.load_latest(st.session_state["session_id"]):
+                    st.session_state["has_newer"] = False
+                st.session_state["pending_query"] = query
+                st.rerun()
+
+            user_message = {"role": "user", "content": query}
+            st.session_state["messages"].append(user_message)
             st.chat_message("user").markdown(query)
 
             with st.spinner("답변을 생성하는 중입니다"):
                 session_id = st.session_state["session_id"]
                 message = await client.fetch_chat_response(self.api_url, query, session_id)
                 if message:
+                    user_message["new_date"] = message.get("new_date")
+                    user_message["tie_index"] = message.get("tie_index")
                     st.session_state["messages"].append(message)
+                    self.trim_history()
                     with st.chat_message("assistant"):
                         def stream_text():
                             for char in message["content"]:
@@ -0,0 +1,51 @@
+from typing import Dict, Any
+
+# session_state 에 유지하는 메시지 구간(sliding window) 계산. streamlit 없이 동작하는 순수 함수만 둠
+
+
+def message_cursor(message: Dict[str, Any]):
+    """서버에 저장된 턴의 (NEW_DATE, TIE_INDEX) 커서. 저장되지 않은 메시지는 None"""
+    if message.get("new_date") is None or message.get("tie_index") is None:
+        return None
+    return {"new_date": message["new_date"], "tie_index": message["tie_index"]}
+
+
+def same_turn(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    cursor = message_cursor(a)
+    return cursor is not None and cursor == message_cursor(b)
+
+
+def keep_oldest(messages: list, limit: int) -> list:
+    """앞쪽 limit 개만 남김 (턴 중간에서 자르지 않음)"""
+    end = min(limit, len(messages))
+    while 0 < end < len(messages) and same_turn(messages[end - 1], messages[end]):
+        end -= 1
+    return messages[:end]
+
+
+def keep_newest(messages: list, limit: int) -> list:
+    """뒤쪽 limit 개만 남김 (턴 중간에서 자르지 않음)"""
+    start = max(len(messages) - limit, 0)
+    while 0 < start < len(messages) and same_turn(messages[start - 1], messages[start]):
+        start += 1
+    return messages[start:]
+
+
+def prepend_older(messages: list, older: list, has_more: bool, limit: int):
+    """
+    이전 페이지를 앞에 붙이고 상한을 넘으면 최신 쪽을 버림
+    (남긴 메시지, 서버에 더 이전 턴이 있는지, 최신 쪽을 버렸는지) 반환
+    """
+    combined = older + messages
+    kept = keep_oldest(combined, limit)
+    return kept, has_more, len(kept) < len(combined)
+
+
+def append_newer(messages: list, newer: list, has_more: bool, limit: int):
+    """
+    다음 페이지를 뒤에 붙이고 상한을 넘으면 가장 오래된 쪽을 버림
+    (남긴 메시지, 서버에 더 최신 턴이 있는지, 오래된 쪽을 버렸는지) 반환
+    """
+    combined = messages + newer
+    kept = keep_newest(combined, limit)
+    return kept, has_more, len(kept) < len(combined)
@@ -42,4 +42,24 @@ async def get_chat_messages(api_url: str, chat_id: str) -> Optional[Dict]:
                 return None
     except Exception as e:
         print(f"API 호출 에러: {e}")
-        return None
\ No newline at end of file
+        return None
+
+async def get_chat_messages_page(api_url: str, chat_id: str, limit: int, before: Optional[Dict] = None, after: Optional[Dict] = None) -> Optional[Dict]:
+    """before / after 는 메시지의 커서 ({"new_date", "tie_index"})"""
+    try:
+        params = {"limit": limit}
+        if before:
+            params["before"] = before["new_date"]
+            params["before_tie"] = before["tie_index"]
+        if after:
+            params["after"] = after["new_date"]
+            params["after_tie"] = after["tie_index"]
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await client.get(f"{api_url}/chat/{chat_id}/messages", params=params)
+            if response.status_code == 200:
+                return response.json()
+            else:
+                return None
+    except Exception as e:
+        print(f"API 호출 에러: {e}")
+        return None
@@ -1,4 +1,9 @@
-from contextlib import asynccontextmanager
+import asyncio
+import importlib
+import time
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
+from typing import Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
@@ -6,11 +11,13 @@ from fastapi import Query
 from fastapi import Path
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic_settings import BaseSettings
 
-from mcp_client import OpenAI_MCPClient
 from models.chat_request import ChatRequest
+from models.message import ChatMessage
 
+from chat_index import chat_index
 from dbconnection import diablo
 from repositories import conversations_repository
 import logging
@@ -20,31 +27,135 @@ load_dotenv()
 
 class Settings(BaseSettings):
     server_script_path: str = "http://localhost:8080/sse"
+    startup_timeout: float = 15.0
+    readiness_timeout: float = 3.0
+    readiness_cache_ttl: float = 60.0
+    search_index_refresh_seconds: float = 30.0
+    search_index_overlap_seconds: float = 60.0
+    search_index_page_size: int = 2000
 
 
 settings = Settings()
 
 
+# readiness 결과를 마지막으로 확인한 시각 (time.monotonic)
+checked_at = {}
+
+
+async def run_check(name: str, coro, timeout: float, readiness: dict):
+    """
+    coro 를 timeout 안에 현재 task 에서 실행하고 결과/지연시간을 readiness[name] 에 기록
+    (wait_for 와 달리 별도 task 를 만들지 않으므로 async context manager 진입에도 사용 가능)
+    """
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(timeout):
+            result = await coro
+        readiness[name] = {"status": "ok" if result is not False else "error"}
+    except TimeoutError:
+        readiness[name] = {"status": "timeout"}
+    except Exception as e:
+        logging.exception(f"{name} 준비 중 오류 발생:")
+        readiness[name] = {"status": "error", "error": str(e)}
+    readiness[name]["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    checked_at[name] = time.monotonic()
+    return readiness[name]["status"] == "ok"
+
+
+def is_fresh(name: str, readiness: dict) -> bool:
+    """정상이었던 결과는 readiness_cache_ttl 동안 재사용, 실패한 결과는 매번 다시 확인"""
+    if readiness.get(name, {}).get("status") != "ok":
+        return False
+    return time.monotonic() - checked_at.get(name, 0.0) < settings.readiness_cache_ttl
+
+
+async def sync_search_index():
+    """
+    마지막으로 읽은 NEW_DATE 이후의 대화를 페이지 단위로 읽어 검색 색인에 반영
+    늦게 commit 된 행과 다른 worker 가 쓴 행을 놓치지 않도록 overlap 만큼 겹쳐 읽고, 중복은 색인에서 거름
+    """
+    since = chat_index.high_water_mark
+    if since is not None:
+        since -= timedelta(seconds=settings.search_index_overlap_seconds)
+    limit = settings.search_index_page_size
+
+    while True:
+        # pyodbc 호출이 event loop 를 막지 않도록 전용 커넥션으로 스레드에서 조회
+        rows = await asyncio.to_thread(conversations_repository.get_conversations_after, since, limit)
+        chat_index.add_rows(rows)
+        if len(rows) < limit:
+            break
+        if rows[-1]["NEW_DATE"] == since:
+            # 한 페이지 전체가 같은 시각이면 페이지를 키워서 다시 읽음
+            limit *= 2
+            continue
+        since = rows[-1]["NEW_DATE"]
+
+
+async def maintain_search_index():
+    """시작 시 검색 색인을 구축하고 이후 주기적으로 catch-up"""
+    while True:
+        try:
+            await sync_search_index()
+            if not chat_index.ready:
+                chat_index.ready = True
+                logging.info("검색 색인 구축 완료")
+        except Exception:
+            logging.exception("검색 색인 갱신 중 오류 발생:")
+        await asyncio.sleep(settings.search_index_refresh_seconds)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    client = OpenAI_MCPClient()
+    readiness = {}
+    app.state.readiness = readiness
+    client = None
+    session_task = None
     try:
-        connected = await client.connect_to_server(settings.server_script_path)
-        if not connected:
+        db_check = asyncio.create_task(
+            run_check("db", asyncio.to_thread(diablo.init_db_connection), settings.startup_timeout, readiness)
+        )
+        # mcp / openai 는 import 비용이 커서 DB 연결과 겹치도록 별도 스레드에서 로드
+        mcp_client = await asyncio.to_thread(importlib.import_module, "mcp_client")
+        client = mcp_client.OpenAI_MCPClient()
+
+        openai_check = asyncio.create_task(
+            run_check("openai", client.warm_llm(), settings.startup_timeout, readiness)
+        )
+        # MCP 세션은 연결/재연결/종료를 전담하는 task 에서 열고 닫음
+        connected = asyncio.get_running_loop().create_future()
+        session_task = asyncio.create_task(
+            client.maintain_session(settings.server_script_path, connected, settings.startup_timeout)
+        )
+        if await run_check("mcp", connected, settings.startup_timeout, readiness):
+            await run_check("tools", client.load_tools(), settings.startup_timeout, readiness)
+        else:
+            readiness["tools"] = {"status": "skipped", "latency_ms": 0.0}
+        await asyncio.gather(db_check, openai_check)
+
+        if readiness["mcp"]["status"] != "ok":
             raise HTTPException(
                 status_code=500, detail="Failed to connect to MCP server"
             )
         app.state.client = client
+        app.state.index_task = asyncio.create_task(maintain_search_index())
         yield
     except Exception as e:
         print(f"Error during lifespan {e}")
         raise e
     finally:
         # shutdown
-        await client.cleanup()
+        for task in (getattr(app.state, "index_task", None), session_task):
+            if task is not None:
+                task.cancel()
+        if session_task is not None:
+            # 세션 task 가 자신의 finally 에서 MCP 세션을 닫을 때까지 대기
+            with suppress(BaseException):
+                await session_task
+        diablo.close_db_connection()
 
 
-app = FastAPI(title="VGT MCP Client", lifespan=lifespan)
+app = FastAPI(title="VGT MCP Client", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,30 +171,73 @@ async def health_check():
     return {"message": "i'm alive!"}
 
 
+async def check_mcp(client, readiness: dict):
+    """MCP ping 이 실패하면 세션 task 에 재연결을 요청하고, 다시 연결되면 도구 목록도 새로 읽음"""
+    if await run_check("mcp", client.ping(), settings.readiness_timeout, readiness):
+        if not is_fresh("tools", readiness):
+            await run_check("tools", client.load_tools(), settings.readiness_timeout, readiness)
+        return
+    if await run_check("mcp", client.reconnect(), settings.readiness_timeout, readiness):
+        await run_check("tools", client.load_tools(), settings.readiness_timeout, readiness)
+
+
+@app.get("/ready")
+async def readiness_check():
+    readiness = app.state.readiness
+    client = getattr(app.state, "client", None)
+
+    checks = [run_check("db", asyncio.to_thread(diablo.check_db_connection), settings.readiness_timeout, readiness)]
+    if client is not None:
+        checks.append(check_mcp(client, readiness))
+        if not is_fresh("openai", readiness):
+            checks.append(run_check("openai", client.warm_llm(), settings.readiness_timeout, readiness))
+    await asyncio.gather(*checks)
+
+    ready = bool(readiness) and all(check["status"] == "ok" for check in readiness.values())
+    return ORJSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "dependencies": readiness},
+    )
+
+
+@app.get("/metrics/models")
+async def model_metrics():
+    return {"tiers": app.state.client.router.summary()}
+
+
 @app.post("/chat")
 async def process_query(request: ChatRequest):
     emp_info = "내 이름(emp_name)은 김준영이고, 사번(emp_code)은 2023243이며 부서명(team_name)은 IT개발팀입니다. 해당 정보를 바탕으로 요청에 답변해주세요."
+    route_text = request.message
     if request.message:
         request.message = f"{emp_info} {request.message}"
     try:
-        messages = await app.state.client.process_chat_message(request.message)
+        messages = await app.state.client.process_chat_message(
+            request.message,
+            route_text=route_text,
+            model_tier=request.model_tier,
+            session_id=request.session_id,
+        )
 
         if not isinstance(messages, list):
             raise ValueError("응답 형식이 잘못되었습니다. 리스트가 아닙니다.")
 
         final_response = next(
-            (m for m in reversed(messages) if m.get("role") == "assistant"),
-            {"role": "assistant", "content": "죄송합니다. 정보를 제공해줄 수 없습니다."}
+            (m for m in reversed(messages) if m.role == "assistant"),
+            ChatMessage.assistant("죄송합니다. 정보를 제공해줄 수 없습니다.")
         )
 
 
         session_id = request.session_id
+        new_date = None
+        tie_index = None
         try:
-            await conversations_repository.insert_mcp_conversation(session_id, "999", request.message, final_response["content"])
+            new_date = await conversations_repository.insert_mcp_conversation(session_id, "999", request.message, final_response.content)
+            tie_index = await conversations_repository.get_turn_tie_index(session_id, new_date, request.message, final_response.content)
         except Exception as db_error:
             logging.exception("DB 저장 중 오류 발생:")
 
-        return {"messages": final_response}
+        return {"messages": {**final_response.to_dict(), "new_date": new_date, "tie_index": tie_index}}
 
     except Exception as e:
         logging.exception("처리 중 예외 발생:")
@@ -101,11 +255,39 @@ async def get_chat_list(emp_code: str = Query(...)):
 
 
 
+@app.get("/chat/search")
+async def search_chat(
+    emp_code: str = Query(...),
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    if not chat_index.ready:
+        raise HTTPException(status_code=503, detail="검색 색인을 준비하는 중입니다. 잠시 후 다시 시도해주세요.")
+    return chat_index.search(emp_code, q, page, page_size)
+
+
 @app.get("/chat/{chat_id}/messages")
-async def get_chat_messages_endpoint(chat_id: str = Path(...)):
+async def get_chat_messages_endpoint(
+    chat_id: str = Path(...),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    before: Optional[datetime] = Query(None),
+    before_tie: int = Query(0, ge=0),
+    after: Optional[datetime] = Query(None),
+    after_tie: int = Query(0, ge=0),
+):
     try:
-        messages = await conversations_repository.get_chat_messages(chat_id)
-        return {"chat_message_list": messages}
+        if limit is None:
+            messages = await conversations_repository.get_chat_messages(chat_id)
+            return {"chat_message_list": messages}
+
+        page = await conversations_repository.get_chat_messages_page(
+            chat_id, limit, before, before_tie, after, after_tie
+        )
+        return {
+            "chat_message_list": page["messages"],
+            "has_more": page["has_more"],
+        }
     except Exception as e:
         logging.exception("채팅 메시지 조회 중 오류 발생:")
         raise HTTPException(status_code=500, detail="채팅 메시지를 불러오는 중 오류가 발생했습니다.")
@@ -115,5 +297,4 @@ async def get_chat_messages_endpoint(chat_id: str = Path(...)):
 if __name__ == "__main__":
     import uvicorn
 
-    diablo.init_db_connection()
     uvicorn.run(app, host="0.0.0.0", port=8001)
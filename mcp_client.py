@@ -1,10 +1,13 @@
+import asyncio
 import json
 import os
+import time
 import traceback
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, suppress
 from datetime import datetime
 from typing import Optional
 
+import orjson
 from mcp import ClientSession
 from mcp.client.sse import sse_client
 from openai import AsyncOpenAI
@@ -12,6 +15,8 @@ from openai.types.chat import ChatCompletionToolParam
 
 from configs.logging import logger
 from configs.settings import OPENAI_API_KEY
+from models.message import ChatMessage
+from model_router import ModelRouter
 
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -25,17 +30,19 @@ class OpenAI_MCPClient:
     def __init__(self):
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
+        self.reconnect_requests: asyncio.Queue[asyncio.Future] = asyncio.Queue()
+        self.pending_reconnect: Optional[asyncio.Future] = None
         self.llm = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        self.router = ModelRouter()
         self.tools = []
-        self.messages = []
+        self.messages: list[ChatMessage] = []
         self.init_message_with_prompt()
         self.logger = logger
 
     def init_message_with_prompt(self):
         date_str, time_str = get_current_date_seoul()
-        system_prompt = {
-            "role": "system",
-            "content": f"""
+        system_prompt = ChatMessage.system(
+            f"""
                 당신은 일반 사용자를 위한 대화형 어시스턴트입니다. 내부 허브에 있는 기능(예: 정보 조회, 예약, 상태 확인 등)을 활용해 사용자가 원하는 서비스를 제공할 수 있습니다. 개발자용 설명이나 코드 예시는 포함하지 않고, 일반 사용자가 이해하기 쉬운 친절한 언어로 안내해야 합니다.
                 현재 날짜는 {date_str}이며, 시간은 {time_str} (Asia/Seoul 기준)입니다. 이 정보를 바탕으로 ‘오늘’, ‘내일’ 등의 표현을 정확히 해석하세요. 내부 허브 기능 호출 시에도 이 날짜/시간 정보를 참고하여 처리합니다.
 
@@ -74,38 +81,24 @@ class OpenAI_MCPClient:
                 - 내부 허브 기능 호출 시에도, 호출 형식이나 파라미터는 사용자 관점에서 쉽게 묻고 안내합니다.
                 - 항상 친절하고 명확한 응답을 제공하며, 모호한 부분은 자연스러운 질문으로 보완합니다.
             """
-        }
+        )
         self.messages.append(system_prompt)
 
     # connect to MCP server
     async def connect_to_server(self, server_url: str):
-        try:
-            self._streams_context = sse_client(url=server_url)
-            streams = await self._streams_context.__aenter__()
+        await self.connect_session(server_url)
+        await self.load_tools()
+        return True
 
-            self._session_context = ClientSession(*streams)
-            self.session = await self._session_context.__aenter__()
+    # open SSE streams and initialize MCP session
+    # sse_client / ClientSession 은 anyio task group 을 열기 때문에 cleanup 과 같은 task 에서 호출해야 함
+    async def connect_session(self, server_url: str):
+        try:
+            streams = await self.exit_stack.enter_async_context(sse_client(url=server_url))
+            self.session = await self.exit_stack.enter_async_context(ClientSession(*streams))
 
             await self.session.initialize()
-
-            mcp_tools = await self.get_mcp_tools()
-            self.tools = [
-                ChatCompletionToolParam(
-                    type="function",
-                    function={
-                        "name": tool.name,
-                        "description": (
-                            tool.description if tool.description is not None else ""
-                        ),
-                        "parameters": tool.inputSchema,
-                    },
-                )
-                for tool in mcp_tools
-            ]
-            self.logger.info(
-                f"Successfully connected to server. Available tools: {[tool['function']['name'] for tool in self.tools]}"
-            )
-
+            self.logger.info(f"Successfully connected to server: {server_url}")
             return True
 
         except Exception as e:
@@ -113,6 +106,72 @@ class OpenAI_MCPClient:
             self.logger.debug(f"Connection error details: {traceback.format_exc()}")
             raise Exception(f"Failed to connect to server: {str(e)}")
 
+    # own the MCP session for the lifetime of the app
+    # 연결/재연결/종료를 모두 이 task 안에서 처리해서 anyio task group 을 연 task 와 닫는 task 를 일치시킴
+    async def maintain_session(self, server_url: str, connected: asyncio.Future, connect_timeout: float):
+        future = connected
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(connect_timeout):
+                        await self.connect_session(server_url)
+                    if not future.done():
+                        future.set_result(True)
+                except Exception as e:
+                    with suppress(Exception):
+                        await self.cleanup()
+                    if not future.done():
+                        future.set_exception(e)
+                future = await self.reconnect_requests.get()
+                with suppress(Exception):
+                    await self.cleanup()
+        finally:
+            await self.cleanup()
+
+    # ask the session task to reopen the MCP session; concurrent callers share one attempt
+    async def reconnect(self):
+        if self.pending_reconnect is None or self.pending_reconnect.done():
+            self.pending_reconnect = asyncio.get_running_loop().create_future()
+            self.reconnect_requests.put_nowait(self.pending_reconnect)
+        # 호출 측 timeout 으로 재연결 자체가 취소되지 않도록 shield
+        return await asyncio.shield(self.pending_reconnect)
+
+    # build OpenAI tool index from MCP tool list
+    async def load_tools(self):
+        mcp_tools = await self.get_mcp_tools()
+        self.tools = [
+            ChatCompletionToolParam(
+                type="function",
+                function={
+                    "name": tool.name,
+                    "description": (
+                        tool.description if tool.description is not None else ""
+                    ),
+                    "parameters": tool.inputSchema,
+                },
+            )
+            for tool in mcp_tools
+        ]
+        self.logger.info(
+            f"Available tools: {[tool['function']['name'] for tool in self.tools]}"
+        )
+        return self.tools
+
+    # warm up OpenAI HTTP connection pool
+    async def warm_llm(self):
+        try:
+            await self.llm.models.list()
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to warm up LLM client: {str(e)}")
+            raise Exception(f"Failed to warm up LLM client: {str(e)}")
+
+    # check MCP session liveness
+    async def ping(self):
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server. Call connect_to_server first.")
+        await self.session.send_ping()
+        return True
 
     # get mcp tool list
     async def get_mcp_tools(self):
@@ -128,39 +187,38 @@ class OpenAI_MCPClient:
             raise Exception(f"Failed to get tools: {str(e)}")
 
     # process chat message
-    async def process_chat_message(self, message: str):
+    async def process_chat_message(
+        self,
+        message: str,
+        route_text: Optional[str] = None,
+        model_tier: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
         if not self.session:
             raise RuntimeError("Not connected to MCP server. Call connect_to_server first.")
         try:
             self.logger.info(f"Processing chat message: {message}")
-            user_message = {"role": "user", "content": message}
+            tier = self.router.choose_tier(route_text or message, session_id, model_tier)
+            user_message = ChatMessage.user(message)
             self.messages.append(user_message)
             await self.log_conversation(self.messages)
             messages = [user_message]
+            tool_round = 0
 
             while True:
                 self.logger.info("Calling OpenAI API")
-                response = await self.call_llm()
+                response = await self.call_llm(tier)
 
                 choice_message = response.choices[0].message
                 self.logger.info(f"Received response: {choice_message}")
 
                 if getattr(choice_message, "tool_calls", None):
-                    assistant_message = {
-                        "role": "assistant",
-                        "content": (choice_message.content),
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "function": {
-                                    "name": tool_call.function.name,
-                                    "arguments": tool_call.function.arguments,
-                                },
-                                "type": tool_call.type,
-                            }
-                            for tool_call in choice_message.tool_calls  # type: ignore
-                        ],
-                    }
+                    tool_round += 1
+                    tier = self.router.escalate(tier, len(choice_message.tool_calls), tool_round)
+                    assistant_message = ChatMessage.assistant(
+                        choice_message.content,
+                        choice_message.tool_calls,
+                    )
                     self.messages.append(assistant_message)
                     await self.log_conversation(self.messages)
                     messages.append(assistant_message)
@@ -181,11 +239,7 @@ class OpenAI_MCPClient:
                             result = await self.session.call_tool(tool_name, tool_args)
                             self.logger.info(f"Tool result: {result}")
 
-                            tool_result_message = {
-                                "role": "tool",
-                                "tool_call_id": tool_use_id,
-                                "content": (result.content),
-                            }
+                            tool_result_message = ChatMessage.tool(tool_use_id, result.content)
                             self.messages.append(tool_result_message)
                             await self.log_conversation(self.messages)
                             messages.append(tool_result_message)
@@ -194,10 +248,8 @@ class OpenAI_MCPClient:
                             self.logger.error(error_msg)
                             raise Exception(error_msg)
                 else:
-                    assistant_message = {
-                        "role": "assistant",
-                        "content": (choice_message.content),
-                    }
+                    assistant_message = ChatMessage.assistant(choice_message.content)
+                    self.router.remember_reply(session_id, assistant_message)
                     self.messages.append(assistant_message)
                     await self.log_conversation(self.messages)
                     messages.append(assistant_message)
@@ -210,18 +262,21 @@ class OpenAI_MCPClient:
             raise Exception(f"Failed to process chat message: {str(e)}")
 
     # call llm
-    async def call_llm(self):
+    async def call_llm(self, tier: str = "smart"):
         if not self.session:
             raise RuntimeError("Not connected to MCP server. Call connect_to_server first.")
         try:
-            self.logger.info("Calling LLM with messages and tools.")
+            model = self.router.model_for(tier)
+            self.logger.info(f"Calling LLM ({tier}: {model}) with messages and tools.")
+            started = time.perf_counter()
             response = await self.llm.chat.completions.create(
-                model="gpt-4o",
-                messages=self.messages,
+                model=model,
+                messages=[message.to_openai() for message in self.messages],
                 tools=self.tools,
                 # tool_choice="auto",
                 # stream=True,
             )
+            self.router.record(tier, started, response.usage)
             return response
         except Exception as e:
             self.logger.error(f"Failed to call LLM: {str(e)}")
@@ -237,49 +292,26 @@ class OpenAI_MCPClient:
             self.logger.error(f"Failed to cleanup MCP client session: {str(e)}")
             self.logger.debug(f"Cleanup error details: {traceback.format_exc()}")
             raise Exception(f"Failed to cleanup session: {str(e)}")
+        finally:
+            # 재연결할 수 있도록 새 exit stack 으로 교체
+            self.exit_stack = AsyncExitStack()
+            self.session = None
 
     # log conversation
-    async def log_conversation(self, conversation: list):
+    async def log_conversation(self, conversation: list[ChatMessage]):
         """Log the conversation to json file"""
         # Create conversations directory if it doesn't exist
         os.makedirs("conversations", exist_ok=True)
 
-        # Convert conversation to JSON-serializable format
-        serializable_conversation = []
-        for message in conversation:
-            try:
-                serializable_message = {"role": message["role"], "content": []}
-
-                # Handle both string and list content
-                if isinstance(message["content"], str):
-                    serializable_message["content"] = message["content"]
-                elif isinstance(message["content"], list):
-                    for content_item in message["content"]:
-                        if hasattr(content_item, "to_dict"):
-                            serializable_message["content"].append(
-                                content_item.to_dict()
-                            )
-                        elif hasattr(content_item, "dict"):
-                            serializable_message["content"].append(content_item.dict())
-                        elif hasattr(content_item, "model_dump"):
-                            serializable_message["content"].append(
-                                content_item.model_dump()
-                            )
-                        else:
-                            serializable_message["content"].append(content_item)
-
-                serializable_conversation.append(serializable_message)
-            except Exception as e:
-                self.logger.error(f"Error processing message: {str(e)}")
-                self.logger.debug(f"Message content: {message}")
-                raise
+        # 메시지는 ingest 시점에 이미 정규화되어 있으므로 그대로 직렬화
+        serializable_conversation = [message.to_openai() for message in conversation]
 
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filepath = os.path.join("conversations", f"conversation_{timestamp}.json")
 
         try:
-            with open(filepath, "w") as f:
-                json.dump(serializable_conversation, f, indent=2, default=str)
+            with open(filepath, "wb") as f:
+                f.write(orjson.dumps(serializable_conversation, option=orjson.OPT_INDENT_2))
         except Exception as e:
             self.logger.error(f"Error writing conversation to file: {str(e)}")
             self.logger.debug(f"Serializable conversation: {serializable_conversation}")
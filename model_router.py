@@ -0,0 +1,105 @@
+import re
+import statistics
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from configs.settings import MODEL_FAST, MODEL_SMART
+from models.message import ChatMessage
+
+MODEL_TIERS = {
+    "fast": MODEL_FAST,
+    "smart": MODEL_SMART,
+}
+
+# 인사 / 감사 / 짧은 긍정 응답만으로 이루어진 메시지 (뒤에 요청이 붙으면 해당 없음)
+SMALL_TALK_PATTERN = re.compile(
+    r"\s*(안녕|안녕하세요|반가워|반갑습니다|고마워|고마워요|고맙습니다|감사해요|감사합니다|네|넵|예|응|좋아요|알겠어요|알겠습니다|ok|okay|thanks|thank you|hi|hello)[\s.,!?~^]*",
+    re.IGNORECASE,
+)
+# 여러 요청이 한 문장에 섞여 있는 경우
+MULTI_INTENT_PATTERN = re.compile(r"(그리고|그 다음|그다음|또한|동시에|및|\band\b|\bthen\b)", re.IGNORECASE)
+
+SHORT_MESSAGE_LENGTH = 30
+LONG_MESSAGE_LENGTH = 80
+# 직전 답변이 재질문이었는지 기억해 둘 세션 수 (오래된 세션부터 버림)
+MAX_TRACKED_SESSIONS = 1000
+
+
+class ModelRouter:
+    """메시지와 세션 상태를 보고 fast / smart 모델 tier 를 선택하고 tier 별 지표를 기록"""
+
+    def __init__(self, window: int = 500, max_sessions: int = MAX_TRACKED_SESSIONS):
+        # 직전 assistant 답변이 추가 정보를 물어본 세션 (session_id 기준)
+        self.awaiting_answer: OrderedDict[str, None] = OrderedDict()
+        self.max_sessions = max_sessions
+        self.stats = {
+            tier: {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latencies_ms": deque(maxlen=window),
+            }
+            for tier in MODEL_TIERS
+        }
+
+    def model_for(self, tier: str) -> str:
+        return MODEL_TIERS[tier]
+
+    def choose_tier(self, message: str, session_id: Optional[str] = None, override: Optional[str] = None) -> str:
+        if override:
+            if override not in MODEL_TIERS:
+                raise ValueError(f"Unknown model tier: {override}")
+            return override
+
+        text = message.strip()
+        if len(text) > LONG_MESSAGE_LENGTH or MULTI_INTENT_PATTERN.search(text) or text.count("?") > 1:
+            return "smart"
+
+        if len(text) <= SHORT_MESSAGE_LENGTH:
+            if SMALL_TALK_PATTERN.fullmatch(text):
+                return "fast"
+            # 같은 세션의 직전 assistant 가 추가 정보를 물어본 경우의 짧은 답변 (예: "네, 3층으로 해주세요")
+            if session_id is not None and session_id in self.awaiting_answer:
+                return "fast"
+
+        return "smart"
+
+    def remember_reply(self, session_id: Optional[str], reply: ChatMessage):
+        """세션의 마지막 assistant 답변이 재질문인지 기록 (다음 choose_tier 에서 사용)"""
+        if session_id is None:
+            return
+        self.awaiting_answer.pop(session_id, None)
+        if reply.content and not reply.tool_calls:
+            if reply.content.rstrip().endswith("?") or "알려주시면" in reply.content:
+                self.awaiting_answer[session_id] = None
+                if len(self.awaiting_answer) > self.max_sessions:
+                    self.awaiting_answer.popitem(last=False)
+
+    def escalate(self, tier: str, tool_call_count: int, tool_round: int) -> str:
+        """fast 모델이 여러 tool 을 한 번에 호출하거나 한 턴에서 두 번째 tool 호출에 들어가면 이후 호출은 smart 로 전환"""
+        if tier == "fast" and (tool_call_count > 1 or tool_round > 1):
+            return "smart"
+        return tier
+
+    def record(self, tier: str, started: float, usage=None):
+        stats = self.stats[tier]
+        stats["calls"] += 1
+        stats["latencies_ms"].append((time.perf_counter() - started) * 1000)
+        if usage is not None:
+            stats["prompt_tokens"] += usage.prompt_tokens or 0
+            stats["completion_tokens"] += usage.completion_tokens or 0
+
+    def summary(self) -> dict:
+        summary = {}
+        for tier, stats in self.stats.items():
+            latencies = stats["latencies_ms"]
+            summary[tier] = {
+                "model": MODEL_TIERS[tier],
+                "calls": stats["calls"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+                "p50_latency_ms": round(statistics.median(latencies), 1) if latencies else None,
+                "p95_latency_ms": round(statistics.quantiles(latencies, n=20)[-1], 1) if len(latencies) > 1 else None,
+            }
+        return summary
@@ -1,10 +1,11 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Literal, Optional
 
 
 class ChatRequest(BaseModel):
     message: str
     session_id: str
+    model_tier: Optional[Literal["fast", "smart"]] = None
 
 
 class Message(BaseModel):
@@ -0,0 +1,89 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(slots=True, frozen=True)
+class ToolCallRef:
+    id: str
+    name: str
+    arguments: str
+    type: str = "function"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "function": {"name": self.name, "arguments": self.arguments},
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class ChatMessage:
+    """
+    대화 이력 한 건. ingest 시점에 한 번만 정규화해 두고, OpenAI 요청 형식 dict 는 필요할 때 만듦
+    (dict 를 캐시하면 같은 내용을 두 벌 들고 있게 되어 세션당 메모리가 오히려 늘어남)
+    """
+    role: str
+    content: Optional[str] = None
+    tool_calls: Optional[tuple[ToolCallRef, ...]] = None
+    tool_call_id: Optional[str] = None
+
+    @classmethod
+    def system(cls, content: str) -> "ChatMessage":
+        return cls(role="system", content=content)
+
+    @classmethod
+    def user(cls, content: str) -> "ChatMessage":
+        return cls(role="user", content=content)
+
+    @classmethod
+    def assistant(cls, content: Optional[str], tool_calls=None) -> "ChatMessage":
+        refs = None
+        if tool_calls:
+            refs = tuple(
+                ToolCallRef(
+                    id=tool_call.id,
+                    name=tool_call.function.name,
+                    arguments=tool_call.function.arguments,
+                    type=tool_call.type,
+                )
+                for tool_call in tool_calls
+            )
+        return cls(role="assistant", content=content, tool_calls=refs)
+
+    @classmethod
+    def tool(cls, tool_call_id: str, content: Any) -> "ChatMessage":
+        return cls(role="tool", content=normalize_content(content), tool_call_id=tool_call_id)
+
+    def to_openai(self) -> dict:
+        """OpenAI chat.completions 요청 형식"""
+        message = {"role": self.role, "content": self.content}
+        if self.tool_calls:
+            message["tool_calls"] = [tool_call.to_dict() for tool_call in self.tool_calls]
+        if self.tool_call_id is not None:
+            message["tool_call_id"] = self.tool_call_id
+        return message
+
+    def to_dict(self) -> dict:
+        """API 응답 / 저장용 형식"""
+        return {"role": self.role, "content": self.content}
+
+
+def normalize_content(content: Any) -> Optional[str]:
+    """MCP content 객체 리스트를 텍스트 하나로 변환"""
+    if content is None or isinstance(content, str):
+        return content
+    if not isinstance(content, list):
+        content = [content]
+
+    parts = []
+    for item in content:
+        text = getattr(item, "text", None)
+        if isinstance(text, str):
+            parts.append(text)
+        elif hasattr(item, "model_dump"):
+            parts.append(json.dumps(item.model_dump(), ensure_ascii=False, default=str))
+        else:
+            parts.append(json.dumps(item, ensure_ascii=False, default=str))
+    return "\n".join(parts)
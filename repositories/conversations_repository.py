@@ -1,13 +1,23 @@
 from dbconnection.diablo import db_manager as db
+from dbconnection.diablo import index_manager
+from chat_index import chat_index
 from datetime import datetime
+from typing import Optional
 
 async def insert_mcp_conversation(session_id: str, emp_code: str, emp_message: str, ai_message: str):
     print("emp_message", emp_message)
 
-    query = "INSERT INTO dbo.TMP_MCP_CONVERSATION(SESSION_ID, EMP_CODE, EMP_MESSAGE, AI_MESSAGE, NEW_DATE) VALUES (?, ?, ?, ?, ?)"
+    # 컬럼 정밀도에 맞게 저장된 NEW_DATE 를 돌려받아 검색 색인 키로 사용
+    query = """
+        INSERT INTO dbo.TMP_MCP_CONVERSATION(SESSION_ID, EMP_CODE, EMP_MESSAGE, AI_MESSAGE, NEW_DATE)
+        OUTPUT INSERTED.NEW_DATE
+        VALUES (?, ?, ?, ?, ?)
+    """
     params = (session_id, emp_code, emp_message, ai_message, datetime.now())
-    results = db.execute_write_query(query, params)
-    return results
+    results = db.execute_write_query_returning(query, params)
+    new_date = results[0]["NEW_DATE"]
+    chat_index.add(session_id, emp_code, emp_message, ai_message, new_date)
+    return new_date
 
 async def get_chat_list(emp_code: str):
     query = """
@@ -31,20 +41,133 @@ async def get_chat_messages(session_id: str):
     """
     params = (session_id,)
     rows = db.execute_query(query, params)
+    return rows_to_messages(rows)
+
+
+# 세션 안에서 NEW_DATE 가 같은 턴을 구분하기 위한 순번 (테이블에 row id 가 없음)
+RANKED_SESSION_ROWS = """
+    WITH RANKED AS (
+        SELECT EMP_MESSAGE, AI_MESSAGE, NEW_DATE,
+               ROW_NUMBER() OVER (PARTITION BY NEW_DATE ORDER BY EMP_MESSAGE, AI_MESSAGE) - 1 AS TIE_INDEX
+        FROM dbo.TMP_MCP_CONVERSATION
+        WHERE SESSION_ID = ?
+    )
+"""
+
+
+async def get_chat_messages_page(
+    session_id: str,
+    limit: int,
+    before: Optional[datetime] = None,
+    before_tie: int = 0,
+    after: Optional[datetime] = None,
+    after_tie: int = 0,
+):
+    """
+    (NEW_DATE, TIE_INDEX) 커서 기준으로 limit 턴을 시간순으로 반환
+    - after 가 있으면 그 커서보다 새로운 턴, 없으면 before 커서(기본: 최신)보다 오래된 턴
+    - has_more 판단을 위해 limit + 1 건 조회
+    """
+    if after is not None:
+        query = RANKED_SESSION_ROWS + """
+            SELECT TOP (?) EMP_MESSAGE, AI_MESSAGE, NEW_DATE, TIE_INDEX
+            FROM RANKED
+            WHERE NEW_DATE > ? OR (NEW_DATE = ? AND TIE_INDEX > ?)
+            ORDER BY NEW_DATE ASC, TIE_INDEX ASC
+        """
+        params = (session_id, limit + 1, after, after, after_tie)
+    else:
+        query = RANKED_SESSION_ROWS + """
+            SELECT TOP (?) EMP_MESSAGE, AI_MESSAGE, NEW_DATE, TIE_INDEX
+            FROM RANKED
+            WHERE NEW_DATE < ? OR (NEW_DATE = ? AND TIE_INDEX < ?)
+            ORDER BY NEW_DATE DESC, TIE_INDEX DESC
+        """
+        before = before or datetime(9999, 12, 31)
+        params = (session_id, limit + 1, before, before, before_tie)
+    rows = db.execute_query(query, params)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is None:
+        rows.reverse()
+    return {
+        "messages": rows_to_messages(rows),
+        "has_more": has_more,
+    }
+
+
+async def get_turn_tie_index(session_id: str, new_date: datetime, emp_message: Optional[str], ai_message: Optional[str]):
+    """
+    방금 저장한 턴의 TIE_INDEX. 페이지 조회와 같은 RANKED_SESSION_ROWS 에서 해당 행만 골라서 읽음
+    내용까지 같은 행이 여러 개면 구분할 수 없으므로 가장 뒤의 순번을 사용
+    """
+    query = RANKED_SESSION_ROWS + """
+        SELECT MAX(TIE_INDEX) AS TIE_INDEX
+        FROM RANKED
+        WHERE NEW_DATE = ?
+          AND (EMP_MESSAGE = ? OR (EMP_MESSAGE IS NULL AND ? IS NULL))
+          AND (AI_MESSAGE = ? OR (AI_MESSAGE IS NULL AND ? IS NULL))
+    """
+    params = (session_id, new_date, emp_message, emp_message, ai_message, ai_message)
+    rows = db.execute_query(query, params)
+    return rows[0]["TIE_INDEX"]
+
 
+def rows_to_messages(rows: list) -> list:
     messages = []
     for row in rows:
         if row["EMP_MESSAGE"]:
             messages.append({
                 "role": "user",
                 "content": row["EMP_MESSAGE"],
-                "new_date": row["NEW_DATE"]
+                "new_date": row["NEW_DATE"],
+                "tie_index": row.get("TIE_INDEX"),
             })
         if row["AI_MESSAGE"]:
             messages.append({
                 "role": "assistant",
                 "content": row["AI_MESSAGE"],
-                "new_date": row["NEW_DATE"]
+                "new_date": row["NEW_DATE"],
+                "tie_index": row.get("TIE_INDEX"),
             })
 
     return messages
+
+
+async def iter_conversations_since(high_water_mark: Optional[datetime], until: datetime, chunk_size: int = 5000):
+    """
+    high_water_mark <= NEW_DATE < until 인 대화를 NEW_DATE 순으로 chunk 단위 스트리밍
+    high_water_mark 와 같은 시각의 행도 다시 반환하므로 호출 측에서 이미 처리한 행을 걸러야 함
+    """
+    query = """
+        SELECT SESSION_ID, EMP_CODE, EMP_MESSAGE, AI_MESSAGE, NEW_DATE
+        FROM dbo.TMP_MCP_CONVERSATION
+        WHERE NEW_DATE >= ? AND NEW_DATE < ?
+        ORDER BY NEW_DATE ASC
+    """
+    params = (high_water_mark or datetime(1900, 1, 1), until)
+    for rows in db.iter_query(query, params, chunk_size):
+        yield rows
+
+
+def get_conversations_after(since: Optional[datetime], limit: int = 2000):
+    """
+    검색 색인 구축 / catch-up 용. 한 페이지씩 끝까지 읽어서 커넥션을 오래 점유하지 않음
+    since 와 같은 시각의 행도 반환하므로 호출 측에서 중복을 걸러야 함
+    요청 처리용 커넥션과 분리된 index_manager 를 쓰므로 asyncio.to_thread 로 호출
+    """
+    query = """
+        SELECT TOP (?) SESSION_ID, EMP_CODE, EMP_MESSAGE, AI_MESSAGE, NEW_DATE
+        FROM dbo.TMP_MCP_CONVERSATION
+        WHERE NEW_DATE >= ?
+        ORDER BY NEW_DATE ASC
+    """
+    params = (limit, since or datetime(1900, 1, 1))
+    index_manager.connect()
+    try:
+        return index_manager.execute_query(query, params)
+    except Exception:
+        # 끊어진 커넥션이면 다음 catch-up 에서 다시 연결
+        index_manager.close()
+        raise
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from chat_index import ChatIndex, tokenize, tokenize_query
+
+
+def build_index(*messages):
+    index = ChatIndex()
+    for i, (emp_message, ai_message) in enumerate(messages):
+        index.add(f"s{i}", "999", emp_message, ai_message, datetime(2025, 6, 20, 9, 0, i))
+    return index
+
+
+def session_ids(result):
+    return [hit["session_id"] for hit in result["hits"]]
+
+
+def test_tokenize_keeps_number_with_following_syllable():
+    tokens = tokenize("3층으로")
+    assert "3층" in tokens
+    assert "3" in tokens
+    assert {"층", "으", "로", "층으", "으로"} <= set(tokens)
+
+
+def test_query_uses_bigrams_only():
+    assert tokenize_query("회의실") == ["회의", "의실"]
+    assert tokenize_query("3층으로") == ["3층", "층으", "으로"]
+    assert tokenize_query("실") == ["실"]
+
+
+def test_multi_syllable_query_does_not_match_single_shared_syllable():
+    index = build_index(
+        ("회의실 예약", ""),
+        ("실내 온도 확인", ""),
+        ("회식 장소 추천", ""),
+        ("의자 교체 요청", ""),
+    )
+    result = index.search("999", "회의실")
+    assert result["total"] == 1
+    assert session_ids(result) == ["s0"]
+
+
+def test_single_syllable_query_matches_inside_longer_word():
+    index = build_index(("회의실 예약", ""), ("3층 회의방 예약", ""))
+    assert session_ids(index.search("999", "실")) == ["s0"]
+    assert session_ids(index.search("999", "방")) == ["s1"]
+
+
+def test_number_floor_query_prefers_same_floor():
+    index = build_index(("5층 회의실 예약해줘", ""), ("3층으로 해주세요", ""))
+    assert session_ids(index.search("999", "3층"))[0] == "s1"
+
+
+def test_same_row_from_insert_and_catch_up_is_indexed_once():
+    index = ChatIndex()
+    new_date = datetime(2025, 6, 20, 9, 0, 0, 3000)
+    index.add("s0", "999", "회의실 예약", "예약되었습니다", new_date)
+    added = index.add_rows([{
+        "SESSION_ID": "s0",
+        "EMP_CODE": 999,
+        "EMP_MESSAGE": "회의실 예약",
+        "AI_MESSAGE": "예약되었습니다",
+        "NEW_DATE": new_date,
+    }])
+
+    assert added == 0
+    assert index.search("999", "회의실")["total"] == 1
+    assert index.high_water_mark == new_date
+
+
+def test_rows_sharing_new_date_are_both_indexed():
+    index = ChatIndex()
+    new_date = datetime(2025, 6, 20, 9, 0, 0)
+    index.add("s0", "999", "회의실 예약", "", new_date)
+    index.add("s0", "999", "휴가 신청", "", new_date)
+    assert index.search("999", "휴가")["total"] == 1
+    assert index.search("999", "회의실")["total"] == 1
+
+
+def test_search_is_paginated():
+    index = build_index(*[(f"회의실 예약 {i}", "") for i in range(5)])
+    first = index.search("999", "회의실", page=1, page_size=2)
+    last = index.search("999", "회의실", page=3, page_size=2)
+    assert first["total"] == 5
+    assert len(first["hits"]) == 2
+    assert len(last["hits"]) == 1
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from gui.history_window import append_newer, keep_newest, keep_oldest, prepend_older
+
+
+def turn(second: int, tie_index: int = 0) -> list:
+    new_date = datetime(2025, 6, 20, 9, 0, second)
+    return [
+        {"role": "user", "content": f"질문 {second}-{tie_index}", "new_date": new_date, "tie_index": tie_index},
+        {"role": "assistant", "content": f"답변 {second}-{tie_index}", "new_date": new_date, "tie_index": tie_index},
+    ]
+
+
+def turns(*keys) -> list:
+    return [message for key in keys for message in turn(*key)]
+
+
+def test_keep_oldest_does_not_split_turn_at_cap():
+    messages = turns((0,), (1,), (2,))
+    kept = keep_oldest(messages, 3)
+    assert kept == turns((0,))
+
+
+def test_keep_newest_does_not_split_turn_at_cap():
+    messages = turns((0,), (1,), (2,))
+    kept = keep_newest(messages, 3)
+    assert kept == turns((2,))
+
+
+def test_turns_sharing_new_date_are_split_by_tie_index():
+    messages = turns((0, 0), (0, 1), (0, 2))
+    assert keep_oldest(messages, 4) == turns((0, 0), (0, 1))
+    assert keep_newest(messages, 4) == turns((0, 1), (0, 2))
+
+
+def test_unsaved_messages_are_not_treated_as_one_turn():
+    messages = [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}]
+    assert keep_oldest(messages, 1) == messages[:1]
+    assert keep_newest(messages, 1) == messages[1:]
+
+
+def test_prepend_older_within_cap_keeps_everything():
+    kept, has_older, evicted = prepend_older(turns((2,)), turns((1,)), True, 10)
+    assert kept == turns((1,), (2,))
+    assert has_older is True
+    assert evicted is False
+
+
+def test_prepend_older_over_cap_evicts_newest_turns():
+    kept, has_older, evicted = prepend_older(turns((2,), (3,)), turns((0,), (1,)), False, 5)
+    assert kept == turns((0,), (1,))
+    assert has_older is False
+    assert evicted is True
+
+
+def test_append_newer_over_cap_evicts_oldest_turns():
+    kept, has_newer, evicted = append_newer(turns((0,), (1,)), turns((2,), (3,)), True, 5)
+    assert kept == turns((2,), (3,))
+    assert has_newer is True
+    assert evicted is True
+
+
+def test_append_newer_within_cap_keeps_everything():
+    kept, has_newer, evicted = append_newer(turns((0,)), turns((1,)), False, 10)
+    assert kept == turns((0,), (1,))
+    assert has_newer is False
+    assert evicted is False
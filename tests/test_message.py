@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from models.message import ChatMessage, normalize_content
+
+
+class TextContent:
+    def __init__(self, text: str):
+        self.type = "text"
+        self.text = text
+
+
+class ImageContent:
+    def model_dump(self):
+        return {"type": "image", "mimeType": "image/png"}
+
+
+def test_normalize_content_keeps_plain_values():
+    assert normalize_content(None) is None
+    assert normalize_content("회의실 301") == "회의실 301"
+
+
+def test_normalize_content_joins_text_items():
+    content = [TextContent("301 예약 가능"), TextContent("302 예약 불가")]
+    assert normalize_content(content) == "301 예약 가능\n302 예약 불가"
+
+
+def test_normalize_content_serializes_non_text_items():
+    content = [TextContent("결과"), ImageContent(), {"floor": 3}]
+    assert normalize_content(content) == '결과\n{"type": "image", "mimeType": "image/png"}\n{"floor": 3}'
+
+
+def test_normalize_content_wraps_single_item():
+    assert normalize_content(TextContent("단일")) == "단일"
+
+
+def test_to_openai_user_message():
+    assert ChatMessage.user("안녕하세요").to_openai() == {"role": "user", "content": "안녕하세요"}
+
+
+def test_to_openai_assistant_tool_calls():
+    tool_call = SimpleNamespace(
+        id="call_1",
+        type="function",
+        function=SimpleNamespace(name="get_meeting_rooms", arguments='{"floor": 3}'),
+    )
+    assert ChatMessage.assistant(None, [tool_call]).to_openai() == {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "get_meeting_rooms", "arguments": '{"floor": 3}'},
+        }],
+    }
+
+
+def test_to_openai_tool_result():
+    message = ChatMessage.tool("call_1", [TextContent('{"rooms": ["301"]}')])
+    assert message.to_openai() == {"role": "tool", "content": '{"rooms": ["301"]}', "tool_call_id": "call_1"}
+
+
+def test_to_openai_returns_fresh_dict():
+    message = ChatMessage.user("안녕하세요")
+    message.to_openai()["content"] = "변경"
+    assert message.to_openai()["content"] == "안녕하세요"
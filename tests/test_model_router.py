@@ -0,0 +1,61 @@
+import pytest
+
+from model_router import ModelRouter
+from models.message import ChatMessage
+
+CLARIFYING_QUESTION = ChatMessage.assistant("몇 층을 조회할까요?")
+
+
+@pytest.mark.parametrize("message", ["안녕하세요!", "감사합니다~", "네", "ok."])
+def test_small_talk_goes_to_fast(message):
+    assert ModelRouter().choose_tier(message) == "fast"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "네 오늘 회의실 전부 취소해줘",
+        "안녕하세요 내일 3층 회의실 예약해줘",
+        "감사 보고서 목록 보여줘",
+        "네, 3층으로 해주세요",
+    ],
+)
+def test_requests_starting_with_small_talk_go_to_smart(message):
+    assert ModelRouter().choose_tier(message) == "smart"
+
+
+def test_short_answer_to_clarifying_question_goes_to_fast():
+    router = ModelRouter()
+    router.remember_reply("session-a", CLARIFYING_QUESTION)
+    assert router.choose_tier("네, 3층으로 해주세요", "session-a") == "fast"
+
+
+def test_clarifying_question_does_not_leak_to_other_sessions():
+    router = ModelRouter()
+    router.remember_reply("session-a", CLARIFYING_QUESTION)
+    assert router.choose_tier("네, 3층으로 해주세요", "session-b") == "smart"
+
+
+def test_answered_question_is_forgotten():
+    router = ModelRouter()
+    router.remember_reply("session-a", CLARIFYING_QUESTION)
+    router.remember_reply("session-a", ChatMessage.assistant("3층 회의실 301 이 예약 가능합니다."))
+    assert router.choose_tier("네, 3층으로 해주세요", "session-a") == "smart"
+
+
+def test_tracked_sessions_are_bounded():
+    router = ModelRouter(max_sessions=2)
+    for session_id in ("session-a", "session-b", "session-c"):
+        router.remember_reply(session_id, CLARIFYING_QUESTION)
+    assert list(router.awaiting_answer) == ["session-b", "session-c"]
+
+
+def test_override_wins():
+    assert ModelRouter().choose_tier("안녕하세요", override="smart") == "smart"
+
+
+def test_escalates_on_parallel_or_second_tool_round():
+    router = ModelRouter()
+    assert router.escalate("fast", 1, 1) == "fast"
+    assert router.escalate("fast", 2, 1) == "smart"
+    assert router.escalate("fast", 1, 2) == "smart"